@@ -16,15 +16,22 @@ USAGE:
 
 ===============================================================================
 """
+import importlib.util
 import logging
 import re
+import sqlite3
+import threading
 import firebase_admin
 from firebase_admin import credentials, firestore
 import time
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Iterator
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from pydantic import BaseModel, Field
 
 
 from selenium import webdriver
@@ -32,7 +39,15 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from bs4 import BeautifulSoup
+import soupsieve as sv
+
+# google-re2 matches in linear time, which pays off on whole-document scans
+try:
+    import re2 as html_re
+except ImportError:
+    html_re = re
 
 # Configure logging
 logging.basicConfig(
@@ -41,6 +56,91 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Patterns used on every product page, compiled once at import
+_PRICE_RE = re.compile(r'\d+\.?\d*')
+_PACK_RE = re.compile(r'([\d.]+)\s*([a-zA-Z]+)')
+_PRICE_STRIP = str.maketrans('', '', ',$')
+_OUT_OF_STOCK_RE = re.compile(r'out of stock|sold out|unavailable|not available', re.IGNORECASE)
+
+# Scrolls to the bottom every interval until the page has been settled (no
+# height growth and no fetch/XHR in flight) for quietTicks ticks in a row, then
+# calls back into Selenium; runs entirely inside the browser
+_SCROLL_SCRIPT = """
+const [interval, quietTicks, done] = arguments;
+// Resource timing entries only appear once a response completes, so count
+// requests that are actually in flight by wrapping fetch and XHR
+if (!window.__scrapeInFlight) {
+    const inFlight = window.__scrapeInFlight = {count: 0};
+    const fetch = window.fetch;
+    window.fetch = function (...args) {
+        inFlight.count++;
+        return fetch.apply(this, args).finally(() => inFlight.count--);
+    };
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function (...args) {
+        inFlight.count++;
+        this.addEventListener('loadend', () => inFlight.count--, {once: true});
+        try {
+            return send.apply(this, args);
+        } catch (e) {
+            inFlight.count--;
+            throw e;
+        }
+    };
+}
+const inFlight = window.__scrapeInFlight;
+let lastHeight = -1;
+let quiet = 0;
+const timer = setInterval(() => {
+    const height = document.body.scrollHeight;
+    if (height === lastHeight && inFlight.count === 0) {
+        if (++quiet >= quietTicks) {
+            clearInterval(timer);
+            done(height);
+        }
+        return;
+    }
+    quiet = 0;
+    lastHeight = height;
+    window.scrollTo(0, height);
+}, interval);
+"""
+
+# lxml's C parser is several times faster than the pure-Python html.parser
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+_LINKS_SCRIPT = "return Array.from(document.querySelectorAll(arguments[0]), a => a.href);"
+
+# Requests the browser never needs to make while scraping: fonts and trackers
+BLOCKED_URLS = [
+    '*.woff', '*.woff2', '*.ttf',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*facebook.net*'
+]
+
+# Upper bound on concurrent headless Chrome instances while scraping
+MAX_BROWSERS = 4
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+def node_text(elem) -> str:
+    """Stripped text of an element, skipping the subtree walk for single-string nodes"""
+    string = elem.string
+    if string is not None:
+        return string.strip()
+    return elem.get_text(strip=True)
+
+
+def compile_html_pattern(pattern: str):
+    """Compile a pattern that scans whole HTML documents; flags must be inline"""
+    return html_re.compile(pattern)
+
+
+@lru_cache(maxsize=256)
+def compile_selector(selector: str) -> sv.SoupSieve:
+    """Compile a CSS selector once and reuse it across pages"""
+    return sv.compile(selector)
+
 
 class Product(BaseModel):
     """Product data model"""
@@ -58,71 +158,207 @@ class Product(BaseModel):
     pack_size_quantity: Optional[float] = None
     pack_size_unit: Optional[str] = None
     in_stock: bool = True
-    scraped_at: datetime = datetime.now()
+    scraped_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class HttpCache:
+    """On-disk cache of HTTP responses and scraped products keyed by URL,
+    revalidated via ETag/Last-Modified"""
+
+    def __init__(self, path: str = 'http_cache.sqlite'):
+        # Shared by the scrape_all worker threads
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS products ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, data TEXT)"
+        )
+        self.conn.commit()
+
+    def get(self, url: str) -> Optional[tuple[Optional[str], Optional[str], str]]:
+        """Return (etag, last_modified, body) for a cached URL"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT etag, last_modified, body FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str):
+        """Store a response body along with its validators"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (url, etag, last_modified, body)
+            )
+            self.conn.commit()
+
+    def get_product(self, url: str) -> Optional[tuple[Optional[str], Optional[str], str]]:
+        """Return (etag, last_modified, product JSON) from the last scrape of url"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT etag, last_modified, data FROM products WHERE url = ?", (url,)
+            ).fetchone()
+
+    def put_products(self, rows: List[tuple[str, Optional[str], Optional[str], str]]):
+        """Remember saved products as (url, etag, last_modified, product JSON) rows"""
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?)", rows)
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
 
 
 class BaseScraper(ABC):
     """Abstract base class for website scrapers"""
 
-    def __init__(self, base_url: str, use_selenium: bool = False):
+    # Subclasses whose product pages are server-rendered set this to False so
+    # those pages skip the browser and can use the full worker pool
+    render_product_pages = True
+
+    def __init__(self, base_url: str, use_selenium: bool = False,
+                 http_cache_path: Optional[str] = 'http_cache.sqlite'):
         self.base_url = base_url
         self.use_selenium = use_selenium
-        self.driver = None
+        # WebDriver sessions are not thread-safe, so each thread gets its own
+        self._local = threading.local()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+        self.http_cache = HttpCache(http_cache_path) if http_cache_path else None
 
         if use_selenium:
             self._setup_selenium()
 
+    @property
+    def driver(self):
+        """WebDriver owned by the calling thread, started on first use"""
+        if not self.use_selenium:
+            return None
+        if getattr(self._local, 'driver', None) is None:
+            self._setup_selenium()
+        return self._local.driver
+
     def _setup_selenium(self):
-        """Setup Selenium WebDriver"""
+        """Setup Selenium WebDriver for the calling thread"""
         chrome_options = Options()
         chrome_options.add_argument('--headless')
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-
-        self.driver = webdriver.Chrome(options=chrome_options)
+        chrome_options.add_argument(f'user-agent={USER_AGENT}')
+        # Image URLs are read from src attributes, the bytes are never needed
+        chrome_options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.default_content_setting_values.notifications': 2
+        })
+
+        driver = webdriver.Chrome(options=chrome_options)
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+        self._local.driver = driver
+        with self._drivers_lock:
+            self._drivers.append(driver)
         logger.info("Selenium WebDriver initialized")
 
-    def fetch_page(self, url: str, delay: float = 2.0, wait_for_selector: str = "body") -> Optional[BeautifulSoup]:
-        """Fetch and parse a webpage"""
+    def fetch_html(self, url: str, delay: float = 2.0, wait_for_selector: str = "body",
+                   render: bool = True) -> Optional[str]:
+        """Fetch raw HTML, rendering through Selenium only when the page needs JS"""
         try:
             time.sleep(delay)
-            self.driver.get(url)
+            if not (render and self.driver):
+                return self._fetch_http(url)
 
-            # Wait for page to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, wait_for_selector))
-            )
-
-            # Additional wait for dynamic content
-            time.sleep(3)
-
-            page_source = self.driver.page_source
-            return BeautifulSoup(page_source, 'html.parser')
+            self._render(url, wait_for_selector)
+            return self.driver.page_source
         except Exception as e:
             logger.error(f"Error fetching {url}: {e}")
             return None
 
-    def scroll_page(self, scroll_pause: float = 2.0):
-        """Scroll page to load lazy-loaded content"""
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
+    def open_page(self, url: str, delay: float = 2.0, wait_for_selector: str = "body") -> bool:
+        """Load a page in the WebDriver without pulling its source back"""
+        try:
+            time.sleep(delay)
+            self._render(url, wait_for_selector)
+            return True
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return False
+
+    def _render(self, url: str, wait_for_selector: str):
+        """Navigate the WebDriver to url and wait for its content"""
+        self.driver.get(url)
+
+        # Wait for page to load
+        WebDriverWait(self.driver, 10).until(
+            EC.presence_of_element_located((By.TAG_NAME, wait_for_selector))
+        )
+
+        # Additional wait for dynamic content
+        time.sleep(3)
+
+    def collect_links(self, selector: str = 'a[href]') -> List[str]:
+        """Absolute hrefs of the anchors matching selector on the loaded page"""
+        # Only the URLs cross the DevTools pipe, not the serialized DOM
+        return self.driver.execute_script(_LINKS_SCRIPT, selector)
+
+    def _fetch_http(self, url: str) -> str:
+        """Plain HTTP GET for pages that are fully server-rendered"""
+        headers = {'User-Agent': USER_AGENT}
+        cached = self.http_cache.get(url) if self.http_cache else None
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
 
-        while True:
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(scroll_pause)
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
+        try:
+            with urlopen(Request(url, headers=headers), timeout=15) as response:
+                charset = response.headers.get_content_charset() or 'utf-8'
+                body = response.read().decode(charset, errors='replace')
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+        except HTTPError as e:
+            # Unchanged since the last scrape, serve the body from disk
+            if e.code == 304 and cached:
+                logger.info(f"Not modified, using cached page: {url}")
+                self._local.validators = cached[0], cached[1]
+                return cached[2]
+            raise
+
+        # Lets _scrape_if_changed record validators without a separate HEAD
+        self._local.validators = etag, last_modified
+
+        if self.http_cache and (etag or last_modified):
+            self.http_cache.put(url, etag, last_modified, body)
+        return body
 
-            if new_height == last_height:
-                break
-            last_height = new_height
+    def fetch_page(self, url: str, delay: float = 2.0, wait_for_selector: str = "body",
+                   render: bool = True) -> Optional[BeautifulSoup]:
+        """Fetch and parse a webpage"""
+        html = self.fetch_html(url, delay=delay, wait_for_selector=wait_for_selector, render=render)
+        if html is None:
+            return None
+        return BeautifulSoup(html, HTML_PARSER)
+
+    def scroll_page(self, scroll_pause: float = 0.4, quiet_period: float = 1.2, timeout: float = 60.0):
+        """Scroll page to load lazy-loaded content"""
+        quiet_ticks = max(1, round(quiet_period / scroll_pause))
+        self.driver.set_script_timeout(timeout)
+        try:
+            self.driver.execute_async_script(_SCROLL_SCRIPT, int(scroll_pause * 1000), quiet_ticks)
+        except TimeoutException:
+            logger.warning(f"Page still growing after {timeout}s of scrolling, continuing")
 
     def extract_text(self, soup: BeautifulSoup, selectors: List[str]) -> Optional[str]:
         """Extract text from first matching selector"""
         for selector in selectors:
-            elem = soup.select_one(selector)
+            elem = compile_selector(selector).select_one(soup)
             if elem:
-                return elem.get_text(strip=True)
+                return node_text(elem)
         return None
 
     def extract_price(self, text: str) -> float:
@@ -130,8 +366,8 @@ class BaseScraper(ABC):
         if not text:
             return 0.0
         # Remove currency symbols and extract number
-        text = text.replace(',', '').replace('$', '').replace('HKD', '').replace('HK', '').strip()
-        match = re.search(r'[\\d]+\\.?\\d*', text)
+        text = text.translate(_PRICE_STRIP).replace('HKD', '').replace('HK', '').strip()
+        match = _PRICE_RE.search(text)
         return float(match.group()) if match else 0.0
 
     def parse_pack_size(self, text: str) -> tuple[Optional[float], Optional[str]]:
@@ -143,7 +379,7 @@ class BaseScraper(ABC):
         text = text.replace('Pack size - ', '').replace('Pack size -', '').strip()
 
         # Parse quantity and unit (e.g., "165 g" -> 165, "g")
-        match = re.match(r'([\\d.]+)\\s*([a-zA-Z]+)', text)
+        match = _PACK_RE.match(text)
         if match:
             quantity = float(match.group(1))
             unit = match.group(2)
@@ -154,7 +390,7 @@ class BaseScraper(ABC):
     def extract_image(self, soup: BeautifulSoup, selectors: List[str]) -> Optional[str]:
         """Extract image URL from first matching selector"""
         for selector in selectors:
-            img = soup.select_one(selector)
+            img = compile_selector(selector).select_one(soup)
             if img and img.get('src'):
                 src = img['src']
                 return src if src.startswith('http') else f"{self.base_url}{src}"
@@ -163,18 +399,13 @@ class BaseScraper(ABC):
     def check_stock(self, soup: BeautifulSoup, out_of_stock_indicators: List[str] = None) -> bool:
         """Check if product is in stock"""
         if out_of_stock_indicators is None:
-            out_of_stock_indicators = [
-                'out of stock',
-                'sold out',
-                'unavailable',
-                'not available'
-            ]
-
-        page_text_lower = soup.get_text().lower()
-        for indicator in out_of_stock_indicators:
-            if indicator in page_text_lower:
-                return False
-        return True
+            pattern = _OUT_OF_STOCK_RE
+        else:
+            pattern = re.compile('|'.join(map(re.escape, out_of_stock_indicators)), re.IGNORECASE)
+
+        # Stock messages can sit anywhere below the header and navigation, so
+        # scan the whole page text, once, for all indicators
+        return pattern.search(soup.get_text()) is None
 
     @abstractmethod
     def get_product_urls(self) -> List[str]:
@@ -186,31 +417,145 @@ class BaseScraper(ABC):
         """Scrape a single product page"""
         pass
 
-    def scrape_all(self, db_manager=None) -> List[Product]:
-        """Scrape all products"""
+    def scrape_all(self, db_manager=None, batch_size: int = 500, max_workers: int = 8) -> List[Product]:
+        """Scrape all products, saving them to db_manager in batches"""
         logger.info(f"Starting scrape of {self.base_url}")
         product_urls = self.get_product_urls()
         logger.info(f"Found {len(product_urls)} products")
 
         products = []
-        for i, url in enumerate(product_urls, 1):
-            logger.info(f"Scraping product {i}/{len(product_urls)}: {url}")
-            product = self.scrape_product(url)
+        pending = []
+        validators = {}
+        results = self._scrape_products(product_urls, max_workers)
+        for i, (url, (product, page_validators)) in enumerate(zip(product_urls, results), 1):
+            if page_validators is None:
+                logger.info(f"Unchanged product {i}/{len(product_urls)}: {url}")
+                products.append(product)
+                continue
+
+            logger.info(f"Scraped product {i}/{len(product_urls)}: {url}")
             if product:
                 products.append(product)
-                # Upsert immediately if db_manager is provided
-                if db_manager:
-                    db_manager.upsert_products([product])
-                    logger.info(f"Product saved to database: {product.name}")
+                pending.append(product)
+                validators[product.url] = page_validators
+                # Flush a full batch so a crash mid-scrape loses at most one batch
+                if db_manager and len(pending) >= batch_size:
+                    self._flush(db_manager, pending, validators)
+
+        if db_manager:
+            self._flush(db_manager, pending, validators)
 
         logger.info(f"Successfully scraped {len(products)} products")
         return products
 
+    def _scrape_products(self, urls: List[str], max_workers: int) -> Iterator[tuple[Optional[Product], Optional[tuple]]]:
+        """Yield _scrape_if_changed results in URL order, fetching pages concurrently when possible"""
+        if max_workers <= 1:
+            yield from map(self._scrape_if_changed, urls)
+            return
+
+        # Each worker renders in its own browser, so keep that pool small; the
+        # calling thread's browser stays open and counts against the cap too
+        if self.use_selenium and self.render_product_pages:
+            max_workers = min(max_workers, max(1, MAX_BROWSERS - len(self._drivers)))
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                yield from executor.map(self._scrape_if_changed, urls)
+        finally:
+            # The worker threads are gone, so nothing can reuse their browsers
+            self._quit_worker_drivers()
+
+    def _scrape_if_changed(self, url: str) -> tuple[Optional[Product], Optional[tuple[Optional[str], Optional[str]]]]:
+        """Scrape url, or reuse the last saved result if the server says the page is unchanged.
+
+        Returns the product and the (etag, last_modified) to record once it has
+        been saved; the validators are None when the saved product was reused.
+        """
+        if not self.http_cache:
+            return self.scrape_product(url), (None, None)
+
+        validators = (None, None)
+        cached = self.http_cache.get_product(url)
+        # Nothing saved yet means nothing to revalidate, so skip the HEAD
+        if cached:
+            unchanged, validators = self._revalidate(url, cached)
+            if unchanged:
+                try:
+                    return Product.model_validate_json(cached[2]), None
+                except ValueError as e:
+                    logger.warning(f"Unreadable cached product for {url}, scraping again: {e}")
+
+        self._local.validators = (None, None)
+        product = self.scrape_product(url)
+        # Prefer the validators of the GET that produced this product
+        if any(self._local.validators):
+            validators = self._local.validators
+        return product, validators
+
+    def _revalidate(self, url: str, cached, delay: float = 2.0) -> tuple[bool, tuple[Optional[str], Optional[str]]]:
+        """HEAD url with the stored validators; returns (unchanged, (etag, last_modified))"""
+        etag, last_modified, _ = cached
+        headers = {'User-Agent': USER_AGENT}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        # Throttled like every other request to the site
+        time.sleep(delay)
+        try:
+            with urlopen(Request(url, headers=headers, method='HEAD'), timeout=5) as response:
+                new_validators = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        except HTTPError as e:
+            if e.code == 304:
+                return True, (etag, last_modified)
+            return False, (None, None)
+        except Exception as e:
+            # A failed HEAD must never stop the real scrape
+            logger.warning(f"HEAD {url} failed: {e}")
+            return False, (None, None)
+
+        unchanged = any(new_validators) and new_validators == (etag, last_modified)
+        return unchanged, new_validators
+
+    def _flush(self, db_manager, pending: List[Product], validators: Dict[str, tuple]):
+        """Write buffered products to the database and clear the buffer"""
+        if not pending:
+            return
+        db_manager.upsert_products(pending)
+        logger.info(f"Saved {len(pending)} products to database")
+
+        # Only products that reached the database may be skipped on later runs
+        if self.http_cache:
+            self.http_cache.put_products([
+                (p.url, *validators.pop(p.url, (None, None)), p.model_dump_json())
+                for p in pending
+            ])
+        pending.clear()
+
+    def _quit_worker_drivers(self):
+        """Quit every WebDriver except the one owned by the calling thread"""
+        own = getattr(self._local, 'driver', None)
+        with self._drivers_lock:
+            workers = [driver for driver in self._drivers if driver is not own]
+            self._drivers = [own] if own else []
+        for driver in workers:
+            driver.quit()
+        if workers:
+            logger.info(f"Closed {len(workers)} worker WebDrivers")
+
     def close(self):
         """Close the scraper and cleanup"""
-        if self.driver:
-            self.driver.quit()
+        for driver in self._drivers:
+            driver.quit()
             logger.info("WebDriver closed")
+        if self.http_cache:
+            self.http_cache.close()
+
+
+# Maximum number of writes Firestore accepts in a single batch commit
+FIRESTORE_BATCH_LIMIT = 500
 
 
 class FirebaseManager:
@@ -236,37 +581,38 @@ class FirebaseManager:
             logger.warning("No products to insert")
             return
 
-        batch = self.db.batch()
         products_ref = self.db.collection('products')
 
-        for p in products:
-            # Use product URL as the document ID
-            doc_id = p.url.replace('/', '_').replace(':', '_')
-            doc_ref = products_ref.document(doc_id)
-            product_data = p.dict()
-            product_data['scraped_at'] = p.scraped_at.isoformat()
-            batch.set(doc_ref, product_data, merge=True)
+        # Firestore rejects batches of more than FIRESTORE_BATCH_LIMIT writes
+        for start in range(0, len(products), FIRESTORE_BATCH_LIMIT):
+            chunk = products[start:start + FIRESTORE_BATCH_LIMIT]
+            batch = self.db.batch()
+            for p in chunk:
+                # Use product URL as the document ID
+                doc_id = p.url.replace('/', '_').replace(':', '_')
+                doc_ref = products_ref.document(doc_id)
+                batch.set(doc_ref, p.model_dump(mode='json'), merge=True)
 
-        try:
-            batch.commit()
-            logger.info(f"Successfully inserted/updated {len(products)} products in Firestore")
-        except Exception as e:
-            logger.error(f"Error inserting products into Firestore: {e}")
-            raise
+            try:
+                batch.commit()
+            except Exception as e:
+                logger.error(f"Error inserting products into Firestore: {e}")
+                raise
+
+        logger.info(f"Successfully inserted/updated {len(products)} products in Firestore")
 
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics from Firestore"""
         try:
             products_ref = self.db.collection('products')
-            total = products_ref.stream()
-            total_products = len(list(total))
 
-            discounted = products_ref.where('discount_percentage', '>', 0).stream()
-            discounted_products = len(list(discounted))
+            # Server-side aggregations, so no documents are downloaded
+            totals = self._aggregate(products_ref.count(alias='total').avg('price', alias='average_price'))
+            total_products = totals['total']
+            avg_price = totals['average_price'] or 0
 
-            # Firestore doesn't support AVG aggregation directly, so we calculate it manually
-            prices = [doc.to_dict().get('price', 0) for doc in products_ref.stream()]
-            avg_price = sum(prices) / len(prices) if prices else 0
+            discounted = products_ref.where(filter=firestore.FieldFilter('discount_percentage', '>', 0))
+            discounted_products = self._aggregate(discounted.count(alias='total'))['total']
 
             # Top brands and categories (requires more complex queries or data duplication)
             # For simplicity, we'll skip this for now.
@@ -284,6 +630,11 @@ class FirebaseManager:
             logger.error(f"Error getting stats from Firestore: {e}")
             return {}
 
+    @staticmethod
+    def _aggregate(query) -> Dict[str, Any]:
+        """Run an aggregation query and map each alias to its value"""
+        return {result.alias: result.value for row in query.get() for result in row}
+
     def close(self):
         """No explicit close needed for Firestore client"""
         logger.info("Firebase connection managed automatically.")
@@ -1,12 +1,68 @@
 import logging
 import re
 from typing import List, Optional
+import soupsieve as sv
 from bs4 import BeautifulSoup
 
-from base import BaseScraper, Product, FirebaseManager
+from base import BaseScraper, Product, FirebaseManager, HTML_PARSER, _OUT_OF_STOCK_RE, compile_html_pattern, node_text
 
 logger = logging.getLogger(__name__)
 
+# SKU markers in the page source, unioned so the page is scanned once; the
+# named groups are ranked by trust in _SKU_PRIORITY
+_SKU_RE = compile_html_pattern(
+    r'(?i)sku["\']?\s*:\s*["\']?(?P<sku>\w+)'
+    r'|product[_-]?id["\']?\s*:\s*["\']?(?P<product_id>\w+)'
+    r'|/products?/[^/]+/(?P<path>\w+)'
+)
+_SKU_PRIORITY = ('sku', 'product_id', 'path')
+_URL_SKU_RE = re.compile(r'/(\d+)/?$')
+
+# Selectors per field in priority order, compiled once at import
+_NAME_SELECTORS = tuple(map(sv.compile, [
+    'h1[class*="product"]',
+    'h1[class*="title"]',
+    '.pdp-title',
+    'h1.heading-1',
+    '[data-testid="product-title"]'
+]))
+_PACK_SIZE_SELECTORS = tuple(map(sv.compile, [
+    '.ProductTitlePrice_productInfo__PtbHb .ProductTitlePrice_packSize__SAa89',
+    '.ProductTitlePrice_productInfo__PtbHb span.my-1',
+    'span.ProductTitlePrice_packSize__SAa89',
+    '.pack-size',
+    '[class*="packSize"]'
+]))
+_PRICE_SELECTORS = tuple(map(sv.compile, [
+    '.ProductTitlePrice_productInfo__PtbHb .heading-lg-bold',
+    '.ProductTitlePrice_productInfo__PtbHb p.heading-lg-bold',
+    'div.ProductTitlePrice_productInfo__PtbHb p',
+    '[class*="price"][class*="current"]',
+    '[class*="price"][class*="sale"]',
+    '.price-value',
+    '[data-testid="product-price"]',
+    'span[class*="price"]'
+]))
+_ORIGINAL_PRICE_SELECTORS = tuple(map(sv.compile, [
+    '[class*="original"]',
+    '[class*="was"]',
+    '[class*="strike"]',
+    '.price-was'
+]))
+_DESCRIPTION_SELECTORS = tuple(map(sv.compile, [
+    '[class*="description"]',
+    '[class*="details"]',
+    '.product-info',
+    '[data-testid="product-description"]'
+]))
+_BREADCRUMB_SELECTOR = sv.compile('.breadcrumb a, [class*="breadcrumb"] a')
+_IMAGE_SELECTORS = tuple(map(sv.compile, [
+    'img[class*="product"]',
+    'img[class*="main"]',
+    '.product-image img',
+    '[data-testid="product-image"]'
+]))
+
 
 class MarksAndSpencerHKScraper(BaseScraper):
     """Scraper for Marks & Spencer Hong Kong website"""
@@ -28,26 +84,14 @@ class MarksAndSpencerHKScraper(BaseScraper):
             logger.info(f"Scraping category: {category}")
             category_url = f"{self.base_url}{category}"
 
-            soup = self.fetch_page(category_url)
-            if not soup:
+            if not self.open_page(category_url):
                 continue
 
             # Scroll to load all products
             self.scroll_page()
 
-            # Re-parse after scrolling
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-
-            # Find product links - adjust selectors based on actual HTML
-            # Common patterns for M&S product links
-            links = soup.find_all('a', href=True)
-
-            for link in links:
-                href = link['href']
-                # M&S product URLs typically contain '/products/' or '/food/products/'
-                if '/products/' in href and '/food/' in href:
-                    full_url = href if href.startswith('http') else f"{self.base_url}{href}"
-                    product_urls.add(full_url)
+            # M&S product URLs typically contain '/products/' or '/food/products/'
+            product_urls.update(self.collect_links('a[href*="/products/"][href*="/food/"]'))
 
             logger.info(f"Found {len(product_urls)} unique products so far")
 
@@ -55,78 +99,45 @@ class MarksAndSpencerHKScraper(BaseScraper):
 
     def scrape_product(self, url: str) -> Optional[Product]:
         """Scrape a single product from M&S HK"""
-        soup = self.fetch_page(url)
-        if not soup:
+        html = self.fetch_html(url)
+        if html is None:
             return None
 
         try:
+            soup = BeautifulSoup(html, HTML_PARSER)
+
             # Extract product name
             name = None
-            name_selectors = [
-                'h1[class*="product"]',
-                'h1[class*="title"]',
-                '.pdp-title',
-                'h1.heading-1',
-                '[data-testid="product-title"]'
-            ]
-            for selector in name_selectors:
-                elem = soup.select_one(selector)
+            for selector in _NAME_SELECTORS:
+                elem = selector.select_one(soup)
                 if elem:
-                    name = elem.get_text(strip=True)
+                    name = node_text(elem)
                     break
 
             # Extract pack size
             pack_size_quantity = None
             pack_size_unit = None
-            pack_size_selectors = [
-                '.ProductTitlePrice_productInfo__PtbHb .ProductTitlePrice_packSize__SAa89',
-                '.ProductTitlePrice_productInfo__PtbHb span.my-1',
-                'span.ProductTitlePrice_packSize__SAa89',
-                '.pack-size',
-                '[class*="packSize"]'
-            ]
-            for selector in pack_size_selectors:
-                elem = soup.select_one(selector)
+            for selector in _PACK_SIZE_SELECTORS:
+                elem = selector.select_one(soup)
                 if elem:
-                    pack_size_text = elem.get_text(strip=True).replace('Pack size - ', '').replace('Pack size -', '')
-                    # Parse quantity and unit (e.g., "165 g" -> 165, "g")
-                    match = re.match(r'([\d.]+)\s*([a-zA-Z]+)', pack_size_text)
-                    if match:
-                        pack_size_quantity = float(match.group(1))
-                        pack_size_unit = match.group(2)
+                    pack_size_quantity, pack_size_unit = self.parse_pack_size(node_text(elem))
                     break
 
             # Extract price
             price = 0.0
-            price_selectors = [
-                '.ProductTitlePrice_productInfo__PtbHb .heading-lg-bold',
-                '.ProductTitlePrice_productInfo__PtbHb p.heading-lg-bold',
-                'div.ProductTitlePrice_productInfo__PtbHb p',
-                '[class*="price"][class*="current"]',
-                '[class*="price"][class*="sale"]',
-                '.price-value',
-                '[data-testid="product-price"]',
-                'span[class*="price"]'
-            ]
-            for selector in price_selectors:
-                elem = soup.select_one(selector)
+            for selector in _PRICE_SELECTORS:
+                elem = selector.select_one(soup)
                 if elem:
-                    price = self._extract_price(elem.get_text(strip=True))
+                    price = self.extract_price(node_text(elem))
                     if price > 0:
                         break
 
             # Extract original price (for discounts)
             original_price = None
-            original_price_selectors = [
-                '[class*="original"]',
-                '[class*="was"]',
-                '[class*="strike"]',
-                '.price-was'
-            ]
-            for selector in original_price_selectors:
-                elem = soup.select_one(selector)
+            for selector in _ORIGINAL_PRICE_SELECTORS:
+                elem = selector.select_one(soup)
                 if elem:
-                    original_price = self._extract_price(elem.get_text(strip=True))
+                    original_price = self.extract_price(node_text(elem))
                     if original_price and original_price > price:
                         break
 
@@ -136,74 +147,47 @@ class MarksAndSpencerHKScraper(BaseScraper):
                 discount = round(((original_price - price) / original_price) * 100, 2)
 
             # Extract SKU
-            sku = None
-            sku_patterns = [
-                r'sku["\']?\s*:\s*["\']?(\w+)',
-                r'product[_-]?id["\']?\s*:\s*["\']?(\w+)',
-                r'/products?/[^/]+/(\w+)'
-            ]
-            page_text = str(soup)
-            for pattern in sku_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    sku = match.group(1)
+            # Canonical and nav links come before the product JSON, so keep the
+            # first match per marker and take the most trusted one
+            found = {}
+            for match in _SKU_RE.finditer(html):
+                found.setdefault(match.lastgroup, match.group(match.lastgroup))
+                if match.lastgroup == 'sku':
                     break
+            sku = next((found[key] for key in _SKU_PRIORITY if key in found), None)
 
             # Extract from URL if not found
             if not sku:
-                match = re.search(r'/(\d+)/?$', url)
+                match = _URL_SKU_RE.search(url)
                 if match:
                     sku = match.group(1)
 
             # Extract category from breadcrumbs
             category = None
-            breadcrumb = soup.select('.breadcrumb a, [class*="breadcrumb"] a')
+            breadcrumb = _BREADCRUMB_SELECTOR.select(soup)
             if breadcrumb:
-                categories = [b.get_text(strip=True) for b in breadcrumb if b.get_text(strip=True)]
+                categories = [text for text in map(node_text, breadcrumb) if text]
                 category = ' > '.join(categories) if categories else None
 
             # Extract description
             description = None
-            desc_selectors = [
-                '[class*="description"]',
-                '[class*="details"]',
-                '.product-info',
-                '[data-testid="product-description"]'
-            ]
-            for selector in desc_selectors:
-                elem = soup.select_one(selector)
+            for selector in _DESCRIPTION_SELECTORS:
+                elem = selector.select_one(soup)
                 if elem:
                     description = elem.get_text(strip=True)[:500]  # Limit length
                     break
 
             # Extract image
             image_url = None
-            img_selectors = [
-                'img[class*="product"]',
-                'img[class*="main"]',
-                '.product-image img',
-                '[data-testid="product-image"]'
-            ]
-            for selector in img_selectors:
-                img = soup.select_one(selector)
+            for selector in _IMAGE_SELECTORS:
+                img = selector.select_one(soup)
                 if img and img.get('src'):
                     src = img['src']
                     image_url = src if src.startswith('http') else f"{self.base_url}{src}"
                     break
 
             # Check stock status
-            in_stock = True
-            out_of_stock_indicators = [
-                'out of stock',
-                'sold out',
-                'unavailable',
-                'not available'
-            ]
-            page_text_lower = soup.get_text().lower()
-            for indicator in out_of_stock_indicators:
-                if indicator in page_text_lower:
-                    in_stock = False
-                    break
+            in_stock = _OUT_OF_STOCK_RE.search(soup.get_text()) is None
 
             if not name:
                 logger.warning(f"Could not extract product name from {url}")
@@ -230,14 +214,6 @@ class MarksAndSpencerHKScraper(BaseScraper):
             logger.error(f"Error parsing product {url}: {e}")
             return None
 
-    def _extract_price(self, text: str) -> float:
-        """Extract numeric price from text"""
-        if not text:
-            return 0.0
-        # Remove currency symbols and extract number
-        text = text.replace(',', '').replace('$', '').replace('HKD', '').strip()
-        match = re.search(r'[\d]+\.?\d*', text)
-        return float(match.group()) if match else 0.0
 
 def main():
     """Main execution function"""
@@ -248,7 +224,7 @@ def main():
         # Initialize scraper
         scraper = MarksAndSpencerHKScraper()
 
-        # Scrape products and save each one immediately
+        # Scrape products, saving them to the database in batches as they come in
         products = scraper.scrape_all(db_manager=db)
 
         # Print statistics
@@ -4,18 +4,32 @@
 
 
 import logging
-import json
+from html import unescape
 from typing import List, Optional
+from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 
-from base import BaseScraper, Product, FirebaseManager
+# orjson parses the large ng-state blobs several times faster than the stdlib
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+from base import BaseScraper, Product, FirebaseManager, HTML_PARSER, compile_html_pattern
 
 logger = logging.getLogger(__name__)
 
+# Scanned straight from the raw HTML without building a DOM
+_PRODUCT_HREF_RE = compile_html_pattern(r'\shref=["\']([^"\']*/p/(?:BP|bp)_[^"\']*)["\']')
+_NG_STATE_RE = compile_html_pattern(r'(?s)<script[^>]*\bid=["\']ng-state["\'][^>]*>(.*?)</script>')
+
 
 class PNSScraper(BaseScraper):
     """Scraper for PNS (PARKnSHOP) Hong Kong website"""
 
+    # Product data ships in the server-rendered ng-state script, no JS needed
+    render_product_pages = False
+
     def __init__(self):
         super().__init__('https://www.pns.hk', use_selenium=True)
 
@@ -37,27 +51,14 @@ class PNSScraper(BaseScraper):
             logger.info(f"Scraping category: {category}")
             category_url = f"{self.base_url}{category}"
 
-            soup = self.fetch_page(category_url)
-            if not soup:
+            if not self.open_page(category_url):
                 continue
 
             # Scroll to load all products
-            self.scroll_page(scroll_pause=2.0)
+            self.scroll_page()
 
-            # Re-parse after scrolling
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-
-            # Find product links
             # PNS uses /p/ for product pages with format: /en/product-name/p/BP_XXXXXX
-            links = soup.find_all('a', href=True)
-
-            for link in links:
-                href = link['href']
-                if '/p/BP_' in href or '/p/bp_' in href:
-                    full_url = href if href.startswith('http') else f"{self.base_url}{href}"
-                    product_urls.add(full_url)
-
-            logger.info(f"Found {len(product_urls)} unique products so far")
+            category_urls = set(self.collect_links('a[href*="/p/BP_"], a[href*="/p/bp_"]'))
 
             # Handle pagination - PNS uses ?page=X
             page_num = 1
@@ -67,40 +68,42 @@ class PNSScraper(BaseScraper):
                 page_num += 1
                 page_url = f"{category_url}?page={page_num}"
 
-                soup = self.fetch_page(page_url, delay=1.5)
-                if not soup:
+                html = self.fetch_html(page_url, delay=1.5)
+                if html is None:
                     break
 
-                # Check if we got new products
-                old_count = len(product_urls)
-                links = soup.find_all('a', href=True)
-
-                for link in links:
-                    href = link['href']
-                    if '/p/BP_' in href or '/p/bp_' in href:
-                        full_url = href if href.startswith('http') else f"{self.base_url}{href}"
-                        product_urls.add(full_url)
+                # Normalize raw attribute text the way the browser's a.href does,
+                # so these compare equal to the page 1 links
+                page_urls = {
+                    urljoin(page_url, unescape(href))
+                    for href in _PRODUCT_HREF_RE.findall(html)
+                }
 
-                # If no new products found, we've reached the end
-                if len(product_urls) == old_count:
+                # Compare against this category only, so products shared with an
+                # earlier category don't end its pagination early
+                if not page_urls - category_urls:
                     logger.info(f"No new products on page {page_num}, moving to next category")
                     break
+                category_urls |= page_urls
+
+            product_urls |= category_urls
+            logger.info(f"Found {len(product_urls)} unique products so far")
 
         return list(product_urls)
 
     def scrape_product(self, url: str) -> Optional[Product]:
         """Scrape a single product from PNS"""
-        soup = self.fetch_page(url)
-        if not soup:
+        html = self.fetch_html(url, render=self.render_product_pages)
+        if html is None:
             return None
 
         try:
-            script_tag = soup.find('script', {'id': 'ng-state'})
-            if not script_tag:
+            match = _NG_STATE_RE.search(html)
+            if not match:
                 logger.warning(f"Could not find ng-state JSON in {url}")
                 return None
 
-            data = json.loads(script_tag.string)
+            data = json_loads(match.group(1))
 
             # The product SKU is the key within 'entities'
             # We need to find it first. We can get it from the JSON-LD script as well or find the first key.
@@ -152,7 +155,7 @@ class PNSScraper(BaseScraper):
             description_html = product_data.get('description', '')
             description = ''
             if description_html:
-                description_soup = BeautifulSoup(description_html, 'html.parser')
+                description_soup = BeautifulSoup(description_html, HTML_PARSER)
                 description = description_soup.get_text(strip=True)[:500]
 
             image_url = product_data.get('images', {}).get('PRIMARY', {}).get('zoom', {}).get('url')
@@ -193,7 +196,7 @@ def main():
         # Initialize scraper
         scraper = PNSScraper()
 
-        # Scrape products and save each one immediately
+        # Scrape products, saving them to the database in batches as they come in
         products = scraper.scrape_all(db_manager=db)
 
         # Print statistics